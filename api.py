@@ -0,0 +1,91 @@
+"""HTTP API for the news engine, independent of Streamlit.
+
+    python api.py --port 8000
+    curl "http://localhost:8000/digest?category=technology&region=us&q=What+about+AI"
+
+GET /digest takes category, region and optionally q (a question), fetch_mode, fact_check,
+prewarmed and incremental (0/1), and returns the digest as JSON; GET /health reports engine
+and cache statistics, including the calls saved by coalescing identical concurrent requests.
+Requests are served concurrently on the engine's worker threads. Starlette and uvicorn are
+installed with Streamlit.
+"""
+import argparse
+import logging
+import os
+from typing import List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from clients import warm_up_clients
+from engine import InvalidRequest, news_engine
+from news_pipeline import digest_to_json, news_cache, llm_cache
+from singleflight import CoalescedTimeout
+
+logger = logging.getLogger("api")
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+
+
+def _flag(request: Request, name: str, default: bool) -> bool:
+    value = request.query_params.get(name)
+    return default if value is None else value.lower() in ("1", "true", "yes")
+
+
+async def digest(request: Request) -> JSONResponse:
+    params = request.query_params
+    if not params.get("category") or not params.get("region"):
+        return JSONResponse({"error": "category and region are required"}, status_code=400)
+    try:
+        result = await news_engine.digest_async(
+            params["category"],
+            params["region"],
+            query=params.get("q", ""),
+            fetch_mode=params.get("fetch_mode", "serial"),
+            fact_check=_flag(request, "fact_check", True),
+            prefer_prewarmed=_flag(request, "prewarmed", True),
+            incremental=_flag(request, "incremental", False),
+        )
+    except InvalidRequest as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except CoalescedTimeout as e:
+        return JSONResponse({"error": str(e)}, status_code=504)
+    except Exception:
+        logger.exception("Digest failed for %s/%s", params["category"], params["region"])
+        return JSONResponse({"error": "digest failed"}, status_code=500)
+    return JSONResponse(digest_to_json(result))
+
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({
+        "status": "ok",
+        "engine": news_engine.stats(),
+        "newsapi_cache": news_cache.stats(),
+        "gemini_cache": llm_cache.stats(),
+    })
+
+
+app = Starlette(routes=[
+    Route("/digest", digest),
+    Route("/health", health),
+])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve news digests over HTTP")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    warm_up_clients()
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
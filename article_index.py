@@ -0,0 +1,90 @@
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+from articles import Article
+
+# --- Inverted index over fetched articles for claim cross-checking ---
+# Built once per fetch and shared by every claim, so a claim lookup only touches
+# the postings of its own terms instead of rescanning every article's text.
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our out over own said same says she should so some
+such than that the their them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+""".split())
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics and drop stop-words and single letters"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+class ArticleIndex:
+    """BM25-scored inverted index over article titles and descriptions"""
+
+    def __init__(self, articles: List[Article]):
+        self.articles = articles
+        self.postings: Dict[str, List[tuple]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for doc_id, article in enumerate(articles):
+            tokens = tokenize(article.search_text)
+            self.doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for token, tf in counts.items():
+                self.postings[token].append((doc_id, tf))
+
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def _idf(self, token: str) -> float:
+        df = len(self.postings.get(token, ()))
+        n = len(self.articles)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, min_matched_terms: int = 2, limit: int = 10) -> List[Dict]:
+        """Rank articles against `query`.
+
+        An article is returned only if it contains at least `min_matched_terms` distinct
+        query terms (or every term, for shorter queries). Each hit is a dict with the
+        article, its BM25 score and the matched terms, best first.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not self.articles:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, List[str]] = defaultdict(list)
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_id, tf in postings:
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / (self.avg_doc_length or 1)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+                matched[doc_id].append(term)
+
+        required = min(min_matched_terms, len(query_terms))
+        ranked = sorted(
+            (doc_id for doc_id in scores if len(matched[doc_id]) >= required),
+            key=lambda doc_id: (-scores[doc_id], doc_id)
+        )
+        return [
+            {"article": self.articles[doc_id], "score": scores[doc_id], "matched_terms": matched[doc_id]}
+            for doc_id in ranked[:limit]
+        ]
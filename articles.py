@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# --- Normalized article records ---
+# NewsAPI articles are converted into slotted Article records once, when they are fetched:
+# unused fields (content, author, source id) are dropped, the timestamp is parsed, and the
+# canonical URL and lowercased search text are computed up front. Ranking, deduplication,
+# cross-checking and rendering read these attributes instead of re-parsing raw dicts.
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ocid", "cmpid", "ref")
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for deduplication: lowercase scheme/host, drop www., tracking params, fragment and trailing slash"""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), query, ""))
+
+
+def parse_published_at(value: Optional[str]) -> Optional[datetime]:
+    """Parse a NewsAPI timestamp ("2024-05-01T12:00:00Z") as an aware datetime; naive times are taken as UTC"""
+    try:
+        published = datetime.fromisoformat((value or "").replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return published if published.tzinfo else published.replace(tzinfo=timezone.utc)
+
+
+def _text(value) -> str:
+    return value.strip() if isinstance(value, str) and value.strip() != "None" else ""
+
+
+class Article:
+    """One news article, normalized at fetch time.
+
+    `published_at` is the original timestamp string and `published` its parsed value (None
+    when missing or malformed). `covered_by` and `related_sources` are set by deduplication.
+    """
+
+    __slots__ = (
+        "title", "description", "url", "image_url", "source", "published_at",
+        "published", "canonical_url", "search_text", "covered_by", "related_sources",
+    )
+
+    def __init__(self, title: str, description: str = "", url: str = "", image_url: Optional[str] = None,
+                 source: str = "Unknown", published_at: str = "", covered_by: int = 1,
+                 related_sources: Sequence[str] = ()):
+        self.title = _text(title)
+        self.description = _text(description)
+        self.url = _text(url)
+        image_url = _text(image_url)
+        self.image_url = image_url if image_url.startswith(("http://", "https://")) else None
+        self.source = _text(source) or "Unknown"
+        self.published_at = _text(published_at)
+        self.published = parse_published_at(self.published_at)
+        self.canonical_url = canonical_url(self.url)
+        self.search_text = f"{self.title} {self.description}".lower()
+        self.covered_by = covered_by
+        self.related_sources = tuple(related_sources)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Article":
+        """Build from a NewsAPI article or from the output of to_dict"""
+        return cls(
+            title=data.get("title"),
+            description=data.get("description"),
+            url=data.get("url"),
+            image_url=data.get("urlToImage"),
+            source=(data.get("source") or {}).get("name"),
+            published_at=data.get("publishedAt"),
+            covered_by=data.get("covered_by", 1),
+            related_sources=data.get("related_sources", ()),
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON form in NewsAPI's field names, for disk caches and digest files"""
+        data = {
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "urlToImage": self.image_url,
+            "publishedAt": self.published_at,
+            "source": {"name": self.source},
+        }
+        if self.covered_by > 1:
+            data["covered_by"] = self.covered_by
+            data["related_sources"] = list(self.related_sources)
+        return data
+
+    @property
+    def key(self) -> str:
+        """Canonical URL, or the title for articles without a URL"""
+        return self.canonical_url or self.title
+
+    def with_coverage(self, sources: List[str]) -> "Article":
+        """Copy of this article reported by `sources`, this article's own outlet first"""
+        article = Article.__new__(Article)
+        for name in Article.__slots__:
+            setattr(article, name, getattr(self, name))
+        article.covered_by = len(sources)
+        article.related_sources = tuple(sources[1:])
+        return article
+
+    def __repr__(self) -> str:
+        return f"Article({self.title!r}, source={self.source!r}, published_at={self.published_at!r})"
+
+
+def newsapi_articles(response: Dict) -> List[Article]:
+    """Normalize the articles of a NewsAPI response"""
+    return [Article.from_dict(raw) for raw in response.get("articles") or []]
+
+
+def articles_to_dicts(articles: Iterable[Article]) -> List[Dict]:
+    return [article.to_dict() for article in articles]
+
+
+def articles_from_dicts(data: Iterable[Dict]) -> List[Article]:
+    return [Article.from_dict(item) for item in data]
@@ -0,0 +1,450 @@
+"""Offline benchmark: drive the real fetch -> summary -> fact-check pipeline against replayed fixtures.
+
+NewsApiClient, genai.GenerativeModel and the Wikipedia endpoint are replaced by fakes that
+serve the JSON fixtures in benchmark_fixtures/, with seeded, configurable latency and failure
+injection, so no keys or network access are needed and runs are comparable across commits:
+
+    python benchmark.py --output bench.json
+    git checkout other-branch && python benchmark.py --compare bench.json
+
+Reports p50/p95 end-to-end and per-stage latency, external calls and Gemini tokens per run,
+peak memory, and the Streamlit script's cold-start import time and time to first paint
+(see startup_profile.py).
+"""
+import os
+
+# Must be set before news_pipeline is imported: no disk caches, no client-side rate limits
+for name, value in {
+    "NEWSAPI_KEY": "benchmark", "GEMINI_API_KEY": "benchmark", "NEWS_CACHE_DB": "", "LLM_CACHE_DB": "",
+    "NEWSAPI_RATE_PER_SECOND": "0", "GEMINI_RATE_PER_SECOND": "0", "WIKIPEDIA_RATE_PER_SECOND": "0",
+    "WIKIPEDIA_CACHE_DB": "", "INCREMENTAL_STATE_DB": "", "TRACE_EXPORT_PATH": "",
+}.items():
+    os.environ.setdefault(name, value)
+
+import argparse
+import json
+import logging
+import random
+import re
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from google.api_core.exceptions import ResourceExhausted
+from newsapi.newsapi_exception import NewsAPIException
+
+import news_pipeline
+from clients import gemini_sdk, reset_clients
+from incremental import incremental_digest, incremental_state
+from news_pipeline import (
+    EnhancedFactCheckTool, MAX_CLAIMS_TO_VERIFY, get_country_news_enhanced, route_query_articles, summarize_articles,
+    newsapi_limiter, gemini_limiter, wikipedia_limiter, news_cache, llm_cache
+)
+from startup_profile import TIME_TO_FIRST_PAINT_TARGET_MS, profile_startup
+from tracing import start_trace
+from wikipedia_entities import found_entity_cache, missing_entity_cache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+DEFAULT_PAIRS = ["technology/us", "business/us", "technology/in", "sports/gb"]
+WIKIPEDIA_HOST = "en.wikipedia.org"
+CHARS_PER_TOKEN = 4
+
+
+class FaultProfile(NamedTuple):
+    latency: float       # mean seconds per call
+    failure_rate: float  # probability that a call fails
+
+
+class FaultInjector:
+    """Seeded latency and failure source, so repeated runs see the same sequence of delays and errors"""
+
+    def __init__(self, profile: FaultProfile, seed: int):
+        self.profile = profile
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self) -> bool:
+        """Sleep for one call's latency; return True if the call should fail"""
+        with self._lock:
+            delay = self._random.lognormvariate(0, 0.35) * self.profile.latency if self.profile.latency else 0.0
+            fail = self._random.random() < self.profile.failure_rate
+        time.sleep(delay)
+        return fail
+
+
+class CallCounter:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self._counts)
+
+
+def load_fixture(directory: str, name: str) -> Dict:
+    with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+# --- Fakes ---
+
+class FixtureNewsApi:
+    """Stands in for NewsApiClient, serving top-headlines by country/category and everything by query"""
+
+    def __init__(self, fixtures: Dict, inject: FaultInjector, counter: CallCounter):
+        self.fixtures = fixtures
+        self.inject = inject
+        self.counter = counter
+
+    def _respond(self, method: str, response: Optional[Dict]) -> Dict:
+        self.counter.add(f"newsapi.{method}")
+        if self.inject():
+            self.counter.add("newsapi.failures")
+            raise NewsAPIException({"status": "error", "code": "rateLimited", "message": "Injected failure"})
+        return response or {"status": "ok", "totalResults": 0, "articles": []}
+
+    def get_top_headlines(self, sources=None, country=None, category=None, **params) -> Dict:
+        if sources and (country or category):
+            # The real client refuses this combination before making a request
+            raise ValueError("cannot mix country/category param with sources param.")
+        return self._respond("get_top_headlines", self.fixtures["top_headlines"].get(f"{country}/{category}"))
+
+    def get_everything(self, q=None, **params) -> Dict:
+        return self._respond("get_everything", self.fixtures["everything"].get(q))
+
+
+class FixtureGemini:
+    """Stands in for genai.GenerativeModel; answers each kind of prompt the pipeline sends"""
+
+    def __init__(self, fixtures: Dict, inject: FaultInjector, counter: CallCounter):
+        self.fixtures = fixtures
+        self.inject = inject
+        self.counter = counter
+
+    def __call__(self, model_name: str, **config) -> "FixtureGemini":
+        return self
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        self.counter.add("gemini.generate_content")
+        self.counter.add("gemini.prompt_tokens", len(prompt) // CHARS_PER_TOKEN)
+        if self.inject():
+            self.counter.add("gemini.failures")
+            raise ResourceExhausted("Injected failure: quota exceeded")
+        text = self.answer(prompt)
+        self.counter.add("gemini.output_tokens", len(text) // CHARS_PER_TOKEN)
+        if not stream:
+            return _fixture_response(text, prompt)
+        lines = text.splitlines(keepends=True)
+        return iter([_fixture_response(line, prompt if i == len(lines) - 1 else None) for i, line in enumerate(lines)])
+
+    def answer(self, prompt: str) -> str:
+        verdicts = self.fixtures["verdicts"]
+        if "verifiable factual claims" in prompt:
+            summary = prompt.split("News Summary:", 1)[-1]
+            claims = [line.strip().lstrip("•").strip() for line in summary.splitlines() if line.strip().startswith("•")]
+            return "```json\n" + json.dumps(claims) + "\n```"
+        if "exactly one bullet point" in prompt:
+            articles = re.findall(r"^\s*(\d+)\. (.+?) - ", prompt.split("NEWS:", 1)[-1], re.MULTILINE)
+            return json.dumps({i: f"{title}." for i, title in articles})
+        if "one object per claim" in prompt:
+            claims = re.findall(r"^\s*(\d+)\. (.+?)\s*$", prompt.split("Claims:", 1)[-1], re.MULTILINE)
+            return json.dumps([
+                dict(verdicts.get(claim, {"verdict": "uncertain", "explanation": "Not in fixtures"}), id=int(i))
+                for i, claim in claims
+            ])
+        if prompt.startswith("Verify this claim:"):
+            claim = prompt.split('"')[1]
+            return json.dumps(verdicts.get(claim, {"verdict": "uncertain", "explanation": "Not in fixtures"}))
+        match = re.match(r"Summarize these (\w+) news", prompt)
+        return self.fixtures["summaries"].get(match.group(1) if match else "", self.fixtures["default_summary"])
+
+
+def _fixture_response(text: str, prompt: Optional[str]):
+    usage = None
+    if prompt is not None:
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        output_tokens = len(text) // CHARS_PER_TOKEN
+        usage = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                                total_token_count=prompt_tokens + output_tokens)
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+class FixtureWikipedia:
+    """Answers requests to en.wikipedia.org at the transport level, so any requests call or Session is covered"""
+
+    def __init__(self, fixtures: Dict, inject: FaultInjector, counter: CallCounter):
+        self.fixtures = fixtures
+        self.inject = inject
+        self.counter = counter
+
+    def send(self, request: requests.PreparedRequest) -> requests.Response:
+        self.counter.add("wikipedia.requests")
+        if self.inject():
+            self.counter.add("wikipedia.failures")
+            status, body = 503, {"error": {"code": "unavailable"}}
+        elif request.path_url.startswith("/w/api.php"):
+            status, body = 200, self.query(parse_qs(urlsplit(request.url).query).get("titles", [""])[0].split("|"))
+        else:
+            status, body = 404, {"type": "not_found"}
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode("utf-8")
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+    def query(self, titles: List[str]) -> Dict:
+        """action=query&prop=pageprops response (formatversion=2) for the requested titles"""
+        self.counter.add("wikipedia.titles", len(titles))
+        normalized, pages = [], []
+        for title in titles:
+            canonical = title[:1].upper() + title[1:]
+            if canonical != title:
+                normalized.append({"from": title, "to": canonical})
+            page = self.fixtures["pages"].get(canonical)
+            if page:
+                pages.append({"title": canonical, "pageprops": {"wikibase-shortdesc": page["extract"].split(",")[0]}})
+            else:
+                pages.append({"title": canonical, "missing": True})
+        return {"batchcomplete": True, "query": {"normalized": normalized, "pages": pages}}
+
+
+def install_fakes(fixtures_dir: str, profiles: Dict[str, FaultProfile], seed: int) -> CallCounter:
+    """Patch the pipeline's external clients with fixture-backed fakes; return the shared call counter"""
+    counter = CallCounter()
+    news_pipeline.newsapi = FixtureNewsApi(
+        load_fixture(fixtures_dir, "newsapi"), FaultInjector(profiles["newsapi"], seed), counter)
+    gemini_sdk().GenerativeModel = FixtureGemini(
+        load_fixture(fixtures_dir, "gemini"), FaultInjector(profiles["gemini"], seed + 1), counter)
+
+    wikipedia = FixtureWikipedia(load_fixture(fixtures_dir, "wikipedia"), FaultInjector(profiles["wikipedia"], seed + 2), counter)
+    real_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        if requests.utils.urlparse(request.url).hostname == WIKIPEDIA_HOST:
+            return wikipedia.send(request)
+        return real_send(session, request, **kwargs)
+
+    requests.Session.send = send
+    reset_clients()  # model handles created before the fakes were installed
+    for limiter in (newsapi_limiter, gemini_limiter, wikipedia_limiter):
+        limiter.configure(0)
+    return counter
+
+
+# --- Measurement ---
+
+def run_pipeline(category: str, region: str, fetch_mode: str, fact_check: bool, user_query: str = "",
+                 incremental: bool = False) -> List[Dict]:
+    """One end-to-end request, as the app runs it; returns the trace rows"""
+    with start_trace("benchmark.run", category=category, region=region) as trace:
+        if incremental:
+            incremental_digest(category, region, fetch_mode, fact_check, notify=lambda level, message: None)
+        else:
+            articles = get_country_news_enhanced(category, region, mode=fetch_mode, notify=lambda level, message: None)
+            if user_query:
+                articles = route_query_articles(articles, user_query, notify=lambda level, message: None).articles
+            summary_text = summarize_articles(category, articles, user_query)
+            if fact_check:
+                fact_checker = EnhancedFactCheckTool()
+                claims = fact_checker.extract_claims_from_summary(summary_text)[:MAX_CLAIMS_TO_VERIFY]
+                for _ in fact_checker.verify_claims_concurrently(claims, articles):
+                    pass
+    return trace.rows()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Linear-interpolated percentile, matching numpy's default"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_latencies(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 0.5), 1),
+        "p95": round(percentile(values, 0.95), 1),
+        "mean": round(sum(values) / len(values), 1),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(pairs: List[Tuple[str, str]], counter: CallCounter, iterations: int = 5, warmup: int = 1,
+                  fetch_mode: str = "serial", fact_check: bool = True, warm_cache: bool = False,
+                  user_query: str = "", incremental: bool = False, sessions: int = 1) -> Dict:
+    """Run every pair `iterations` times and aggregate latency, call counts and memory.
+    With `incremental`, the per-pair state survives between runs even when caches start cold,
+    so timed runs measure a refresh in which no article is new. With `sessions` > 1 each run
+    is a burst of that many identical concurrent requests; "coalescing" counts the calls they shared."""
+    coalescing_caches = (news_cache, llm_cache)
+
+    def run(category: str, region: str) -> List[List[Dict]]:
+        if not warm_cache:
+            for cache in (news_cache, llm_cache, found_entity_cache, missing_entity_cache):
+                cache.clear()
+        if sessions == 1:
+            return [run_pipeline(category, region, fetch_mode, fact_check, user_query, incremental)]
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            return list(executor.map(
+                lambda _: run_pipeline(category, region, fetch_mode, fact_check, user_query, incremental),
+                range(sessions)
+            ))
+
+    incremental_state.clear()
+
+    for _ in range(warmup):
+        for category, region in pairs:
+            run(category, region)
+
+    totals, stages = [], {}
+    before = counter.snapshot()
+    coalesced_before = sum(cache.stats()["coalesced"] for cache in coalescing_caches)
+    for _ in range(iterations):
+        for category, region in pairs:
+            for rows in run(category, region):
+                totals.append(rows[0]["duration_ms"])
+                run_stages = Counter()
+                for row in rows:
+                    if row["depth"] == 1:
+                        run_stages[row["name"]] += row["duration_ms"] or 0.0
+                for name, duration in run_stages.items():
+                    stages.setdefault(name, []).append(duration)
+    calls = counter.snapshot() - before
+    coalesced = sum(cache.stats()["coalesced"] for cache in coalescing_caches) - coalesced_before
+    runs = len(totals)
+
+    # Memory is measured on a separate pass: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    for category, region in pairs:
+        run(category, region)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "revision": git_revision(),
+        "runs": runs,
+        "latency_ms": summarize_latencies(totals),
+        "stages_ms": {name: summarize_latencies(values) for name, values in sorted(stages.items())},
+        "calls_per_run": {key: round(count / runs, 2) for key, count in sorted(calls.items())},
+        "coalescing": {
+            "sessions": sessions,
+            "saved_calls_per_run": round(coalesced / runs, 2),
+        },
+        "memory_kb": {
+            "peak_traced": round(peak / 1024, 1),
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        },
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """Side-by-side lines for every numeric metric present in both result sets"""
+    def flatten(data: Dict, prefix: str = "") -> Dict[str, float]:
+        flat = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                flat[prefix + key] = value
+        return flat
+
+    old = flatten({key: value for key, value in baseline.items() if key != "scenario"})
+    new = flatten({key: value for key, value in results.items() if key != "scenario"})
+    lines = []
+    if baseline.get("scenario") != results.get("scenario"):
+        lines.append("warning: the runs used different scenarios, numbers may not be comparable")
+    lines += [f"{'metric':<48} {baseline.get('revision') or 'baseline':>12} {results.get('revision') or 'current':>12}  change"]
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        if before and after is not None:
+            change = f"{(after - before) / before * 100:+.1f}%"
+        else:
+            change = "-"
+        lines.append(f"{key:<48} {before if before is not None else '-':>12} {after if after is not None else '-':>12}  {change}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the news pipeline offline against recorded fixtures")
+    parser.add_argument("--pairs", nargs="+", default=DEFAULT_PAIRS, help="category/region pairs (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=5, help="timed runs per pair")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per pair first")
+    parser.add_argument("--fetch-mode", choices=news_pipeline.FETCH_MODES, default="serial")
+    parser.add_argument("--no-fact-check", action="store_true", help="stop after the summary")
+    parser.add_argument("--warm-cache", action="store_true", help="keep caches between runs instead of starting cold")
+    parser.add_argument("--query", default="", help="user question; articles are routed by relevance to it")
+    parser.add_argument("--incremental", action="store_true",
+                        help="refresh through incremental_digest (ignores --query)")
+    parser.add_argument("--sessions", type=int, default=1,
+                        help="identical requests started at once per run, to measure request coalescing")
+    parser.add_argument("--newsapi-latency", type=float, default=0.12, help="mean seconds per NewsAPI call")
+    parser.add_argument("--gemini-latency", type=float, default=0.6, help="mean seconds per Gemini call")
+    parser.add_argument("--wikipedia-latency", type=float, default=0.08, help="mean seconds per Wikipedia request")
+    parser.add_argument("--newsapi-failure-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    parser.add_argument("--wikipedia-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="fixture directory (default: %(default)s)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--startup-runs", type=int, default=3,
+                        help="cold starts of news_app.py to profile (0 = skip)")
+    parser.add_argument("--first-paint-target-ms", type=float, default=TIME_TO_FIRST_PAINT_TARGET_MS)
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    pairs = [tuple(pair.split("/", 1)) for pair in args.pairs]
+    profiles = {
+        "newsapi": FaultProfile(args.newsapi_latency, args.newsapi_failure_rate),
+        "gemini": FaultProfile(args.gemini_latency, args.gemini_failure_rate),
+        "wikipedia": FaultProfile(args.wikipedia_latency, args.wikipedia_failure_rate),
+    }
+    counter = install_fakes(args.fixtures, profiles, args.seed)
+    results = run_benchmark(pairs, counter, args.iterations, args.warmup, args.fetch_mode,
+                            not args.no_fact_check, args.warm_cache, args.query, args.incremental, args.sessions)
+    if args.startup_runs:
+        results["startup"] = profile_startup(os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_app.py"),
+                                             args.startup_runs, args.first_paint_target_ms)
+    results["scenario"] = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "fixtures")}
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            print("\n".join(compare(results, json.load(baseline_file))))
+    else:
+        print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
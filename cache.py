@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import tracing
+from singleflight import SingleFlight
+
+# --- Shared TTL/LRU cache with an optional SQLite tier ---
+# Instances live in this module rather than in the Streamlit script, so they survive
+# Streamlit reruns (which re-execute news_app.py) and are shared by every session in the process.
+
+FRESH = "fresh"
+STALE = "stale"
+TRACE_COUNTERS = {FRESH: "hits", STALE: "stale_hits", None: "misses"}
+
+
+class TTLCache:
+    """In-memory LRU cache with per-entry TTL, stale-while-revalidate and an optional SQLite backend.
+
+    Entries younger than `ttl` are fresh. Entries younger than `ttl + stale_ttl` are served
+    as-is while a background refresh recomputes them. Anything older is a miss.
+    Values must be JSON-serializable when `db_path` is set, or converted by `serialize`
+    (value -> JSON data) and `deserialize` (JSON data -> value) on their way to and from disk.
+    Concurrent misses for the same key share one computation through `flight`.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int = 256, stale_ttl: float = 0.0,
+                 db_path: Optional[str] = None, max_disk_entries: Optional[int] = None,
+                 serialize: Optional[Callable[[Any], Any]] = None, deserialize: Optional[Callable[[Any], Any]] = None):
+        self.namespace = namespace
+        self.serialize = serialize or (lambda value: value)
+        self.deserialize = deserialize or (lambda data: data)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries or max_entries * 4
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self.flight = SingleFlight(namespace)
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "errors": 0}
+        self._db = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _encode_key(key: Hashable) -> str:
+        return key if isinstance(key, str) else json.dumps(key, sort_keys=True, default=str)
+
+    def _max_age(self) -> float:
+        return self.ttl + self.stale_ttl
+
+    def _load_from_disk(self, key: str) -> Optional[Tuple[float, Any]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            return (row[1], self.deserialize(json.loads(row[0]))) if row else None
+        except (sqlite3.Error, ValueError, TypeError, KeyError, AttributeError):
+            self._counters["errors"] += 1
+            return None
+
+    def _store_to_disk(self, key: str, stored_at: float, value: Any) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(self.serialize(value)), stored_at),
+            )
+            # Age- and size-based eviction for the disk tier
+            self._db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND stored_at < ?",
+                (self.namespace, time.time() - self._max_age()),
+            )
+            self._db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key NOT IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT ?)",
+                (self.namespace, self.namespace, self.max_disk_entries),
+            )
+            self._db.commit()
+        except (sqlite3.Error, TypeError, ValueError):
+            self._counters["errors"] += 1
+
+    def lookup(self, key: Hashable) -> Tuple[Any, Optional[str]]:
+        """Return (value, FRESH | STALE) or (None, None) on a miss, updating the counters"""
+        encoded = self._encode_key(key)
+        with self._lock:
+            entry = self._entries.get(encoded)
+            if entry is None or time.time() - entry[0] >= self.ttl:
+                # Another process sharing the SQLite file may have stored a newer value
+                disk_entry = self._load_from_disk(encoded)
+                if disk_entry is not None and (entry is None or disk_entry[0] > entry[0]):
+                    entry = disk_entry
+                    self._remember(encoded, *entry)
+            if entry is not None:
+                age = time.time() - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(encoded)
+                    self._counters["hits"] += 1
+                    return entry[1], FRESH
+                if age < self._max_age():
+                    self._entries.move_to_end(encoded)
+                    self._counters["stale_hits"] += 1
+                    return entry[1], STALE
+                self._entries.pop(encoded, None)
+            self._counters["misses"] += 1
+            return None, None
+
+    def _remember(self, key: str, stored_at: float, value: Any) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        encoded = self._encode_key(key)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(encoded, stored_at, value)
+            self._store_to_disk(encoded, stored_at, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Serve from cache, recompute on a miss (once for concurrent misses of the same key), or serve
+        stale data while refreshing in the background"""
+        value, state = self.lookup(key)
+        tracing.record(f"cache.{self.namespace}.{TRACE_COUNTERS[state]}")
+        if state == FRESH:
+            return value
+        if state == STALE:
+            self._refresh_in_background(key, compute)
+            return value
+
+        def compute_and_store():
+            value = compute()
+            self.set(key, value)
+            return value
+        return self.flight.do(self._encode_key(key), compute_and_store)
+
+    def _refresh_in_background(self, key: Hashable, compute: Callable[[], Any]) -> None:
+        encoded = self._encode_key(key)
+        with self._lock:
+            if encoded in self._refreshing:
+                return
+            self._refreshing.add(encoded)
+            self._counters["refreshes"] += 1
+
+        def refresh():
+            try:
+                self.set(key, compute())
+            except Exception:
+                self._counters["errors"] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(encoded)
+
+        threading.Thread(target=refresh, name=f"{self.namespace}-refresh", daemon=True).start()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+            stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        flight_stats = self.flight.stats()
+        stats["coalesced"] = flight_stats["coalesced"]
+        stats["coalesce_timeouts"] = flight_stats["timeouts"]
+        return stats
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    """Content address for an LLM call: sha256 of the model name plus the whitespace-normalized prompt"""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(namespace: str, **config) -> TTLCache:
+    """Return the process-wide cache for `namespace`, creating it with `config` on first use"""
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = TTLCache(namespace, **config)
+        return _caches[namespace]
@@ -0,0 +1,97 @@
+import importlib
+import os
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    import requests
+
+# --- Process-wide API clients ---
+# Keep-alive HTTP sessions and Gemini model handles are created once per process and shared
+# across Streamlit reruns, sessions and worker threads, so the hot path pays no TCP/TLS
+# handshake or client construction cost. The SDKs themselves (requests, google.generativeai,
+# newsapi) are imported on first use, so importing this module costs nothing at startup;
+# warm_up_clients() loads them in the background once the UI has rendered.
+
+DEFAULT_POOL_SIZE = 10
+# Only connection-level failures (e.g. a keep-alive socket the server already closed) are
+# retried by the adapter; 429/5xx handling with backoff stays in ratelimit.call_with_retries.
+CONNECT_RETRIES = 2
+CONNECT_BACKOFF_SECONDS = 0.2
+USER_AGENT = "ai-news-summarizer/1.0 (https://github.com/SaiPavan-28/LLM-Training-Automations)"
+
+_sessions: Dict[str, "requests.Session"] = {}
+_sessions_lock = threading.Lock()
+_gemini_lock = threading.Lock()
+_gemini_configured = False
+_warm_up_started = False
+
+
+def http_session(name: str, pool_size: int = DEFAULT_POOL_SIZE) -> "requests.Session":
+    """Return the process-wide keep-alive session for `name`, creating it on first use.
+    `pool_size` bounds the connections kept open per host and should cover the callers' threads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    with _sessions_lock:
+        if name not in _sessions:
+            retry = Retry(total=CONNECT_RETRIES, connect=CONNECT_RETRIES, read=0, status=0, other=0,
+                          backoff_factor=CONNECT_BACKOFF_SECONDS, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _sessions[name] = session
+        return _sessions[name]
+
+
+def gemini_sdk():
+    """The google.generativeai module, imported and configured with GEMINI_API_KEY on first use"""
+    global _gemini_configured
+    import google.generativeai as genai
+
+    with _gemini_lock:
+        if not _gemini_configured:
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            _gemini_configured = True
+    return genai
+
+
+@lru_cache(maxsize=16)
+def _generative_model(model_name: str, generation_config: tuple) -> "genai.GenerativeModel":
+    return gemini_sdk().GenerativeModel(model_name, generation_config=dict(generation_config) or None)
+
+
+def generative_model(model_name: str, **generation_config) -> "genai.GenerativeModel":
+    """Cached Gemini model handle per model name and generation config"""
+    return _generative_model(model_name, tuple(sorted(generation_config.items())))
+
+
+def warm_up_clients() -> None:
+    """Import and configure the SDKs on a daemon thread, once per process, so the first
+    request does not pay for them; callers never wait for it"""
+    global _warm_up_started
+    with _sessions_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def warm_up():
+        for module in ("requests", "newsapi"):
+            importlib.import_module(module)
+        gemini_sdk()
+
+    threading.Thread(target=warm_up, name="client-warm-up", daemon=True).start()
+
+
+def reset_clients() -> None:
+    """Drop cached model handles and close pooled sessions, e.g. after swapping in test doubles"""
+    _generative_model.cache_clear()
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
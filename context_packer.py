@@ -0,0 +1,79 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from article_index import ArticleIndex
+from articles import Article
+
+# --- Token-budget-aware prompt context ---
+# Replaces slicing the joined article text at a fixed character count: articles are ranked
+# by relevance and recency, then whole articles are packed greedily into a token budget.
+
+CHARS_PER_TOKEN = 4  # rough average for English prose with Gemini's tokenizer
+DEFAULT_TOKEN_BUDGET = 1500
+RELEVANCE_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.4
+RECENCY_HALF_LIFE_HOURS = 24.0
+
+
+class PackedContext(NamedTuple):
+    text: str
+    included: List[Article]
+    dropped: List[Dict]  # {"article": ..., "reason": ...}
+    tokens_used: int
+    token_budget: int
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def format_article(article: Article) -> str:
+    line = f"{article.title} - {article.description}"
+    if article.covered_by > 1:
+        line += f" [reported by {article.covered_by} outlets]"
+    return line
+
+
+def rank_articles(articles: List[Article], query: str = "", now: Optional[datetime] = None) -> List[Article]:
+    """Order articles by a blend of BM25 relevance to `query` and exponential recency decay"""
+    now = now or datetime.now(timezone.utc)
+    relevance = {}
+    if query.strip():
+        hits = ArticleIndex(articles).search(query, min_matched_terms=1, limit=len(articles))
+        top_score = hits[0]["score"] if hits else 0.0
+        relevance = {id(hit["article"]): hit["score"] / top_score for hit in hits if top_score}
+
+    def score(article: Article) -> float:
+        if article.published is None:
+            recency = 0.0
+        else:
+            age_hours = max(0.0, (now - article.published).total_seconds() / 3600)
+            recency = 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+        return RELEVANCE_WEIGHT * relevance.get(id(article), 0.0) + RECENCY_WEIGHT * recency
+
+    return sorted(articles, key=score, reverse=True)  # stable: ties keep fetch order
+
+
+def pack_articles(articles: List[Article], query: str = "", token_budget: int = DEFAULT_TOKEN_BUDGET,
+                  now: Optional[datetime] = None) -> PackedContext:
+    """Greedily fill `token_budget` with whole articles, best-ranked first.
+
+    Articles without a description are skipped, as are articles that would overflow the
+    budget; a smaller, lower-ranked article may still fit after a large one is dropped.
+    """
+    included, dropped, lines = [], [], []
+    tokens_used = 0
+    for article in rank_articles(articles, query, now):
+        if not article.description:
+            dropped.append({"article": article, "reason": "no description"})
+            continue
+        line = format_article(article)
+        cost = estimate_tokens(line) + 1  # newline separator
+        if tokens_used + cost > token_budget:
+            dropped.append({"article": article, "reason": "over token budget"})
+            continue
+        included.append(article)
+        lines.append(line)
+        tokens_used += cost
+    return PackedContext("\n".join(lines), included, dropped, tokens_used, token_budget)
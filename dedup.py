@@ -0,0 +1,89 @@
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from article_index import tokenize
+from articles import Article
+
+# --- Cross-source article deduplication ---
+# Wire stories syndicated by several outlets arrive with slightly different titles and URLs.
+# Articles are clustered by canonical URL and by Jaccard similarity of word-shingles over
+# title + description; only articles sharing a shingle are ever compared, so a few hundred
+# articles deduplicate in milliseconds.
+
+SIMILARITY_THRESHOLD = 0.5
+SHINGLE_SIZE = 2
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[Tuple[str, ...]]:
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _representative_rank(article: Article) -> Tuple:
+    """Prefer articles with a description, an image, more text and a later timestamp"""
+    return (bool(article.description), bool(article.image_url), len(article.description), article.published_at)
+
+
+def deduplicate_articles(articles: List[Article], threshold: float = SIMILARITY_THRESHOLD) -> List[Article]:
+    """Collapse duplicate and near-duplicate articles.
+
+    Returns one representative per cluster, in order of each cluster's first appearance.
+    Representatives are copies carrying `covered_by` (number of distinct outlets) and
+    `related_sources` (the other outlets' names).
+    """
+    parent = list(range(len(articles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    first_by_url: Dict[str, int] = {}
+    shingle_sets: List[Set[Tuple[str, ...]]] = []
+    postings: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+    for i, article in enumerate(articles):
+        url = article.canonical_url
+        if url:
+            if url in first_by_url:
+                union(first_by_url[url], i)
+            else:
+                first_by_url[url] = i
+
+        article_shingles = shingles(article.search_text)
+        shingle_sets.append(article_shingles)
+        candidates = set()
+        for shingle in article_shingles:
+            candidates.update(postings[shingle])
+            postings[shingle].append(i)
+        for j in candidates:
+            if find(i) == find(j):
+                continue
+            overlap = len(article_shingles & shingle_sets[j])
+            if overlap / (len(article_shingles) + len(shingle_sets[j]) - overlap) >= threshold:
+                union(i, j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(articles)):
+        clusters[find(i)].append(i)
+
+    deduplicated = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        best = max(members, key=lambda i: (_representative_rank(articles[i]), -i))
+        # Members may already be clusters (e.g. fetched headlines merged with search results),
+        # so their related sources are kept and deduplicating twice loses no coverage
+        sources = []
+        for i in [best] + [m for m in members if m != best]:
+            for source in (articles[i].source,) + articles[i].related_sources:
+                if source not in sources:
+                    sources.append(source)
+        deduplicated.append(articles[best].with_coverage(sources))
+    return deduplicated
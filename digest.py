@@ -0,0 +1,193 @@
+"""Batch digest: fetch, summarize and optionally fact-check every (category, region) pair.
+
+Runs outside Streamlit, e.g. from cron:
+
+    python digest.py --output digest.jsonl --workers 6 --fact-check
+
+Each line of the output is a JSON object with a "type" of "digest" (one per pair),
+"error" (a pair that failed), "article" (one per unique article across all pairs)
+or "run" (throughput and error counts for the whole batch).
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from articles import Article
+from incremental import incremental_digest
+from news_pipeline import (
+    FETCH_MODES, all_pairs, build_digest, newsapi_limiter, gemini_limiter, news_cache, llm_cache
+)
+from tracing import start_trace, export_trace
+
+logger = logging.getLogger("digest")
+
+DEFAULT_OUTPUT = "digest.jsonl"
+DEFAULT_WORKERS = 4
+
+
+class ArticleRegistry:
+    """Thread-safe record of every article seen across pairs, keyed by canonical URL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._articles: Dict[str, Article] = {}
+        self._pairs: Dict[str, List[str]] = {}
+
+    def register(self, articles: List[Article], pair_label: str) -> Tuple[List[str], int]:
+        """Record a pair's articles; return their canonical URLs and how many were already seen"""
+        urls, shared = [], 0
+        with self._lock:
+            for article in articles:
+                url = article.key
+                if url in self._articles:
+                    shared += 1
+                else:
+                    self._articles[url] = article
+                    self._pairs[url] = []
+                if pair_label not in self._pairs[url]:
+                    self._pairs[url].append(pair_label)
+                urls.append(url)
+        return urls, shared
+
+    def records(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "type": "article",
+                    "url": url,
+                    "title": article.title,
+                    "description": article.description,
+                    "source": article.source,
+                    "publishedAt": article.published_at,
+                    "pairs": self._pairs[url],
+                }
+                for url, article in self._articles.items()
+            ]
+
+
+def digest_pair(category: str, region: str, registry: ArticleRegistry,
+                fetch_mode: str = "serial", fact_check: bool = False, incremental: bool = False) -> Dict:
+    """Fetch, summarize and optionally fact-check one pair, returning its digest record"""
+    with start_trace("digest.pair", category=category, region=region, fetch_mode=fetch_mode) as trace:
+        record = _digest_pair(category, region, registry, fetch_mode, fact_check, incremental)
+    export_trace(trace)
+    record["trace_id"] = trace.trace_id
+    return record
+
+
+def _digest_pair(category: str, region: str, registry: ArticleRegistry, fetch_mode: str, fact_check: bool,
+                 incremental: bool) -> Dict:
+    start = time.monotonic()
+    build = incremental_digest if incremental else build_digest
+    digest = build(category, region, fetch_mode=fetch_mode, fact_check=fact_check)
+    urls, shared = registry.register(digest["articles"], f"{category}/{region}")
+
+    record = {
+        "type": "digest",
+        "category": category,
+        "region": region,
+        "generated_at": digest["generated_at"],
+        "summary": digest["summary"],
+        "article_urls": urls,
+        "shared_articles": shared,
+        "fetch_latencies": digest["fetch_latencies"],
+    }
+    if fact_check:
+        record["fact_check"] = {
+            "credibility_score": digest["fact_check"]["credibility_score"],
+            "claims": digest["fact_check"]["claims"],
+        }
+    if incremental:
+        record["incremental"] = digest["incremental"]
+
+    record["elapsed_seconds"] = round(time.monotonic() - start, 3)
+    return record
+
+
+def run_digest(pairs: List[Tuple[str, str]], output_path: str, workers: int = DEFAULT_WORKERS,
+               fetch_mode: str = "serial", fact_check: bool = False, incremental: bool = False) -> Dict:
+    """Digest every pair concurrently, streaming records to `output_path`; return run statistics"""
+    registry = ArticleRegistry()
+    write_lock = threading.Lock()
+    start = time.monotonic()
+    succeeded = failed = 0
+
+    with open(output_path, "w", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="digest") as executor:
+
+        def write(record: Dict) -> None:
+            with write_lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+
+        futures = {
+            executor.submit(digest_pair, category, region, registry, fetch_mode, fact_check, incremental): (category, region)
+            for category, region in pairs
+        }
+        for future in as_completed(futures):
+            category, region = futures[future]
+            try:
+                write(future.result())
+                succeeded += 1
+            except Exception as e:
+                logger.exception("Digest failed for %s/%s", category, region)
+                write({"type": "error", "category": category, "region": region, "error": str(e)})
+                failed += 1
+
+        article_records = registry.records()
+        for record in article_records:
+            write(record)
+
+        elapsed = time.monotonic() - start
+        stats = {
+            "type": "run",
+            "pairs": len(pairs),
+            "succeeded": succeeded,
+            "failed": failed,
+            "unique_articles": len(article_records),
+            "elapsed_seconds": round(elapsed, 3),
+            "pairs_per_minute": round(len(pairs) / elapsed * 60, 2) if elapsed else None,
+            "newsapi_cache": news_cache.stats(),
+            "gemini_cache": llm_cache.stats(),
+        }
+        write(stats)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize every (category, region) pair into a JSONL digest")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSONL file to write (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="pairs processed concurrently")
+    parser.add_argument("--categories", nargs="+", help="limit to these categories")
+    parser.add_argument("--regions", nargs="+", help="limit to these regions")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default="serial")
+    parser.add_argument("--fact-check", action="store_true", help="also extract and verify claims")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only summarize and fact-check articles that are new since the previous run")
+    parser.add_argument("--newsapi-rps", type=float, help="NewsAPI requests per second (0 = unlimited)")
+    parser.add_argument("--gemini-rps", type=float, help="Gemini requests per second (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.newsapi_rps is not None:
+        newsapi_limiter.configure(args.newsapi_rps, newsapi_limiter.capacity)
+    if args.gemini_rps is not None:
+        gemini_limiter.configure(args.gemini_rps, gemini_limiter.capacity)
+
+    pairs = [
+        (category, region) for category, region in all_pairs()
+        if (not args.categories or category in args.categories) and (not args.regions or region in args.regions)
+    ]
+    stats = run_digest(pairs, args.output, args.workers, args.fetch_mode, args.fact_check, args.incremental)
+    print(f"Digested {stats['succeeded']}/{stats['pairs']} pairs ({stats['failed']} errors) "
+          f"in {stats['elapsed_seconds']}s - {stats['pairs_per_minute']} pairs/min, "
+          f"{stats['unique_articles']} unique articles -> {args.output}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
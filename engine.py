@@ -0,0 +1,174 @@
+"""Headless news engine: the single entry point for digests, shared by the Streamlit UI,
+the HTTP API (api.py) and any other in-process caller.
+
+API clients, caches and rate limiters are created once per process when news_pipeline is
+imported; a NewsEngine only decides where a digest comes from (pre-warmed store, incremental
+refresh or a full pipeline run) and bounds how many full runs execute at once. The Streamlit
+live view, which streams the summary and each claim check, runs the stages itself but inside
+live_run(), so it shares that bound; its NewsAPI and Gemini calls are coalesced with other
+sessions' through the caches.
+"""
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, Optional
+
+from clients import http_session
+from incremental import incremental_digest
+from news_pipeline import FETCH_MODES, build_digest, digest_from_json, log_notify
+from prewarm import cached_digest, request_popularity
+from singleflight import CoalescedTimeout, SingleFlight
+from tracing import start_trace, span, export_trace
+
+CATEGORIES = ("technology", "business", "sports", "health", "science", "entertainment")
+COUNTRY_NAMES = {"us": "USA", "in": "India", "gb": "UK", "ca": "Canada", "au": "Australia", "de": "Germany", "fr": "France"}
+REGIONS = tuple(COUNTRY_NAMES)
+QUERY_PATTERN = re.compile(r"^[a-zA-Z0-9\s.,!?'-]*$")
+MAX_QUERY_LENGTH = 300
+
+ENGINE_MAX_CONCURRENT = int(os.getenv("ENGINE_MAX_CONCURRENT", "4"))  # full pipeline runs at once
+ENGINE_WORKERS = int(os.getenv("ENGINE_WORKERS", "16"))  # threads serving async callers
+NEWS_ENGINE_URL = os.getenv("NEWS_ENGINE_URL", "")  # set to make the UI a client of a running api.py
+REMOTE_TIMEOUT_SECONDS = float(os.getenv("REMOTE_TIMEOUT_SECONDS", "120"))
+ENGINE_COALESCE_TIMEOUT_SECONDS = float(os.getenv("ENGINE_COALESCE_TIMEOUT_SECONDS", "120"))  # wait for an identical run
+
+PREWARMED = "prewarmed"
+INCREMENTAL = "incremental"
+LIVE = "live"
+
+
+class InvalidRequest(ValueError):
+    """A digest request the engine refuses to run; the message is safe to show to users"""
+
+
+def validate_request(category: str, region: str, query: str = "", fetch_mode: str = "serial") -> None:
+    if category not in CATEGORIES:
+        raise InvalidRequest(f"Unknown category {category!r}")
+    if region not in REGIONS:
+        raise InvalidRequest(f"Unknown region {region!r}")
+    if fetch_mode not in FETCH_MODES:
+        raise InvalidRequest(f"Unknown fetch mode {fetch_mode!r}")
+    if query and not QUERY_PATTERN.match(query):
+        raise InvalidRequest("Invalid characters detected.")
+    if len(query) > MAX_QUERY_LENGTH:
+        raise InvalidRequest("Query too long!")
+
+
+class NewsEngine:
+    """Serves digests in-process. Safe to share across threads, Streamlit sessions and event loops.
+
+    Identical requests that arrive while a run is in flight wait for that run instead of
+    starting their own (see stats() for the runs saved).
+    """
+
+    remote = False
+
+    def __init__(self, max_concurrent: int = ENGINE_MAX_CONCURRENT, workers: int = ENGINE_WORKERS,
+                 coalesce_timeout: float = ENGINE_COALESCE_TIMEOUT_SECONDS):
+        self._runs = threading.BoundedSemaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="engine")
+        self._flight = SingleFlight("engine", timeout=coalesce_timeout)
+
+    def prewarmed(self, category: str, region: str) -> Optional[Dict]:
+        digest, _ = cached_digest(category, region)
+        return dict(digest, served_from=PREWARMED) if digest else None
+
+    def digest(self, category: str, region: str, query: str = "", fetch_mode: str = "serial",
+               fact_check: bool = True, prefer_prewarmed: bool = True, incremental: bool = False,
+               notify: Callable[[str, str], None] = log_notify) -> Dict:
+        """Digest for one pair; "served_from" tells whether it was pre-warmed, refreshed
+        incrementally or built live. Questions always run live. A caller that joins an identical
+        run already in flight gets its digest (and none of its notifications), or CoalescedTimeout."""
+        validate_request(category, region, query, fetch_mode)
+        request_popularity.record(category, region)
+        with span("engine.digest", category=category, region=region, has_query=bool(query)) as digest_span:
+            digest = self.prewarmed(category, region) if prefer_prewarmed and not query else None
+            if digest is None:
+                incremental = incremental and not query
+                key = (category, region, " ".join(query.lower().split()), fetch_mode, fact_check, incremental)
+                digest = dict(self._flight.do(key, partial(
+                    self._run, category, region, query, fetch_mode, fact_check, incremental, notify
+                )))
+            digest_span.set(served_from=digest["served_from"])
+        return digest
+
+    def _run(self, category: str, region: str, query: str, fetch_mode: str, fact_check: bool,
+             incremental: bool, notify: Callable[[str, str], None]) -> Dict:
+        with self._runs:
+            if incremental:
+                return dict(incremental_digest(category, region, fetch_mode, fact_check, notify=notify),
+                            served_from=INCREMENTAL)
+            return dict(build_digest(category, region, fetch_mode, fact_check,
+                                     user_query=query, notify=notify), served_from=LIVE)
+
+    @contextmanager
+    def live_run(self, category: str, region: str, query: str = "", fetch_mode: str = "serial") -> Iterator[None]:
+        """Hold one of the full-run slots while the caller runs the pipeline stages itself"""
+        validate_request(category, region, query, fetch_mode)
+        request_popularity.record(category, region)
+        with span("engine.live_run", category=category, region=region, has_query=bool(query)), self._runs:
+            yield
+
+    def stats(self) -> Dict[str, int]:
+        """Full runs started ("leaders") and saved by joining an identical run ("coalesced")"""
+        return self._flight.stats()
+
+    def traced_digest(self, category: str, region: str, **options) -> Dict:
+        """digest() under its own exported trace, for callers outside any UI request"""
+        with start_trace("engine.request", category=category, region=region) as trace:
+            digest = self.digest(category, region, **options)
+        export_trace(trace)
+        return dict(digest, trace_id=trace.trace_id)
+
+    async def digest_async(self, category: str, region: str, **options) -> Dict:
+        """Run traced_digest on the engine's worker threads without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.traced_digest, category, region, **options))
+
+
+class RemoteEngine:
+    """Same interface as NewsEngine, served by api.py over HTTP"""
+
+    remote = True
+
+    def __init__(self, base_url: str, timeout: float = REMOTE_TIMEOUT_SECONDS):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def prewarmed(self, category: str, region: str) -> Optional[Dict]:
+        return None  # decided by the server
+
+    def digest(self, category: str, region: str, query: str = "", fetch_mode: str = "serial",
+               fact_check: bool = True, prefer_prewarmed: bool = True, incremental: bool = False,
+               notify: Callable[[str, str], None] = log_notify) -> Dict:
+        validate_request(category, region, query, fetch_mode)
+        with span("engine.remote", url=self.base_url) as remote_span:
+            response = http_session("engine").get(f"{self.base_url}/digest", timeout=self.timeout, params={
+                "category": category,
+                "region": region,
+                "q": query,
+                "fetch_mode": fetch_mode,
+                "fact_check": int(fact_check),
+                "prewarmed": int(prefer_prewarmed),
+                "incremental": int(incremental),
+            })
+            remote_span.set(status=response.status_code)
+            if response.status_code == 400:
+                raise InvalidRequest(response.json().get("error", "Invalid request"))
+            if response.status_code == 504:
+                raise CoalescedTimeout(response.json().get("error", "Digest timed out"))
+            response.raise_for_status()
+            return digest_from_json(response.json())
+
+
+news_engine = NewsEngine()
+
+
+def default_engine():
+    """The remote engine when NEWS_ENGINE_URL is set, otherwise the in-process one"""
+    return RemoteEngine(NEWS_ENGINE_URL) if NEWS_ENGINE_URL else news_engine
+
@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from clients import http_session
+
+# --- Local thumbnail pipeline for article images ---
+# Publisher images are fetched in the background, downscaled to the width the UI shows and
+# kept on disk by URL hash, so rendering never waits on (or re-downloads from) slow image hosts.
+
+THUMBNAIL_WIDTH = 150
+THUMBNAIL_QUALITY = 80
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", ".cache/images")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+IMAGE_FETCH_TIMEOUT_SECONDS = 5.0
+IMAGE_MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+IMAGE_PREFETCH_WORKERS = 8
+FAILED_RETRY_SECONDS = 600.0
+PLACEHOLDER_COLOR = (79, 70, 229)  # #4F46E5, same as the old remote placeholder
+
+
+class ThumbnailCache:
+    """Disk cache of downscaled article images with concurrent background prefetch and size-bounded eviction"""
+
+    def __init__(self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 width: int = THUMBNAIL_WIDTH, max_workers: int = IMAGE_PREFETCH_WORKERS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._in_flight: Dict[str, Future] = {}
+        self._failed: Dict[str, float] = {}  # url -> monotonic time after which to retry
+        self._lock = threading.Lock()
+
+    def path_for(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".jpg")
+
+    def prefetch(self, urls: Iterable[str]) -> None:
+        """Start downloading any uncached images in the background"""
+        for url in urls:
+            self._submit(url)
+
+    def _submit(self, url: str) -> Optional[Future]:
+        if not url or not url.startswith(("http://", "https://")) or os.path.exists(self.path_for(url)):
+            return None
+        with self._lock:
+            if time.monotonic() < self._failed.get(url, 0.0):
+                return None
+            future = self._in_flight.get(url)
+            is_new = future is None
+            if is_new:
+                future = self._executor.submit(self._fetch, url)
+                self._in_flight[url] = future
+        if is_new:
+            future.add_done_callback(lambda done, url=url: self._finished(url, done))
+        return future
+
+    def _finished(self, url: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(url, None)
+            if future.exception() is not None or future.result() is None:
+                self._failed[url] = time.monotonic() + FAILED_RETRY_SECONDS
+
+    def get(self, url: str, timeout: float = 0.0) -> Optional[str]:
+        """Return the local thumbnail path, waiting up to `timeout` seconds for an in-flight download"""
+        path = self.path_for(url) if url else None
+        if path and os.path.exists(path):
+            return path
+        future = self._submit(url)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=max(0.0, timeout))
+        except Exception:
+            return None
+
+    def _fetch(self, url: str) -> Optional[str]:
+        with http_session("images", IMAGE_PREFETCH_WORKERS).get(url, timeout=IMAGE_FETCH_TIMEOUT_SECONDS,
+                                                                stream=True) as response:
+            response.raise_for_status()
+            data = response.raw.read(IMAGE_MAX_DOWNLOAD_BYTES + 1, decode_content=True)
+        if len(data) > IMAGE_MAX_DOWNLOAD_BYTES:
+            return None
+
+        from PIL import Image  # imported on first use to keep app start-up fast
+
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((self.width, self.width * 4))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        path = self.path_for(url)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        image.save(temporary_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+        os.replace(temporary_path, path)
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        """Delete least recently written thumbnails until the directory fits in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+@lru_cache(maxsize=16)
+def placeholder_image(text: str = "News", width: int = THUMBNAIL_WIDTH, height: int = 100) -> bytes:
+    """PNG placeholder drawn locally instead of fetched from an external placeholder service"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (width, height), PLACEHOLDER_COLOR)
+    draw = ImageDraw.Draw(image)
+    left, top, right, bottom = draw.textbbox((0, 0), text)
+    draw.text(((width - (right - left)) / 2, (height - (bottom - top)) / 2), text, fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def shared_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide thumbnail cache, shared across Streamlit reruns and sessions"""
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
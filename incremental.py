@@ -0,0 +1,146 @@
+"""Incremental digests: only articles and claims that are new since the last run go to Gemini.
+
+Per (category, region) the state store keeps one bullet per summarized article, keyed by
+canonical URL + publishedAt, and the verification result of every claim together with the
+articles it came from. A refresh summarizes only unseen articles, drops bullets and claims
+whose articles left the feed, and verifies only the claims extracted from the new bullets.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from cache import shared_cache
+from articles import Article
+from context_packer import format_article
+from news_pipeline import (
+    ENHANCED_SAFETY_INSTRUCTIONS, MAX_CLAIMS_TO_VERIFY, EnhancedFactCheckTool, get_country_news_enhanced,
+    pack_summary_context, clean_summary, generate_text_cached, parse_json_response, log_notify
+)
+from tracing import span
+
+INCREMENTAL_STATE_DB = os.getenv("INCREMENTAL_STATE_DB", ".cache/incremental_state.sqlite3")
+INCREMENTAL_STATE_TTL_SECONDS = float(os.getenv("INCREMENTAL_STATE_TTL_SECONDS", str(24 * 3600)))
+
+incremental_state = shared_cache(
+    "incremental_state",
+    ttl=INCREMENTAL_STATE_TTL_SECONDS,
+    max_entries=128,
+    db_path=INCREMENTAL_STATE_DB or None
+)
+
+
+def article_id(article: Article) -> str:
+    """Stable identity of an article version: canonical URL (or title) plus publication time"""
+    return f"{article.key}|{article.published_at}"
+
+
+def build_bullet_prompt(category: str, articles: List[Article]) -> str:
+    numbered_news = "\n".join(f"{i}. {format_article(article)}" for i, article in enumerate(articles, 1))
+    return f"""Summarize each of these {category} news articles in exactly one bullet point. {ENHANCED_SAFETY_INSTRUCTIONS}
+        Respond with ONLY a JSON object mapping each article number to its bullet text, e.g. {{"1": "..."}}.
+
+        NEWS:
+        {numbered_news}"""
+
+
+def summarize_new_articles(category: str, articles: List[Article],
+                           notify: Callable[[str, str], None] = log_notify) -> Dict[str, Dict]:
+    """One bullet per article from a single Gemini call, keyed by article_id.
+    Articles Gemini skipped, or all of them on an error, get their title as a fallback bullet."""
+    bullets = {}
+    with span("summary.incremental", articles=len(articles)) as summary_span:
+        try:
+            parsed = parse_json_response(generate_text_cached(build_bullet_prompt(category, articles)))
+            bullets = parsed if isinstance(parsed, dict) else {}
+        except Exception as e:
+            notify("warning", f"⚠️ Gemini error, using titles for new articles: {e}")
+            summary_span.set(fallback=True)
+
+    summaries = {}
+    for i, article in enumerate(articles, 1):
+        bullet = bullets.get(str(i))
+        summaries[article_id(article)] = {
+            "title": article.title,
+            "bullet": clean_summary(bullet).strip() if isinstance(bullet, str) and bullet.strip() else article.title,
+            "fallback": not (isinstance(bullet, str) and bullet.strip())  # retried on the next refresh
+        }
+    return summaries
+
+
+def incremental_digest(category: str, region: str, fetch_mode: str = "serial", fact_check: bool = True,
+                       latencies: Optional[Dict[str, float]] = None, notify=log_notify) -> Dict:
+    """Same result as news_pipeline.build_digest, reusing the bullets and claim verifications of
+    articles that were already summarized; the "incremental" entry reports what was reused"""
+    if latencies is None:
+        latencies = {}
+    articles = get_country_news_enhanced(category, region, mode=fetch_mode, latencies=latencies, notify=notify)
+    state, _ = incremental_state.lookup((category, region))
+    state = state or {"articles": {}, "claims": []}
+
+    # Same article selection as the full summary: ranked and packed into the token budget
+    included = pack_summary_context(category, articles).included
+    ids = [article_id(article) for article in included]
+    known = {
+        id_: summary for id_, summary in state["articles"].items()
+        if id_ in ids and not summary.get("fallback")
+    }
+    new_articles = [article for article, id_ in zip(included, ids) if id_ not in known]
+    new_summaries = summarize_new_articles(category, new_articles, notify) if new_articles else {}
+    summaries = {**known, **new_summaries}
+    summary_text = "\n".join(f"• {summaries[id_]['bullet']}" for id_ in ids)
+
+    stats = {"new_articles": len(new_articles), "reused_articles": len(known)}
+    digest = {
+        "category": category,
+        "region": region,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "articles": articles,
+        "summary": summary_text,
+        "summary_fallback": any(summaries[id_]["fallback"] for id_ in ids),
+        "fetch_latencies": latencies,
+        "incremental": stats
+    }
+
+    claims_state = [claim for claim in state["claims"] if set(claim["article_ids"]) & set(ids)]
+    if fact_check:
+        fact_checker = EnhancedFactCheckTool()
+        new_claims = []
+        fresh_summaries = [summaries[id_] for id_ in new_summaries if not summaries[id_]["fallback"]]
+        if fresh_summaries:
+            extracted = fact_checker.extract_claims_from_summary(
+                "\n".join(f"• {summary['bullet']}" for summary in fresh_summaries)
+            )
+            seen = {claim["claim"] for claim in claims_state}
+            new_claims = [claim for claim in dict.fromkeys(extracted) if isinstance(claim, str) and claim not in seen]
+
+        # New claims first, then earlier ones whose articles are still in the feed
+        new_claims = new_claims[:MAX_CLAIMS_TO_VERIFY]
+        results = [None] * len(new_claims)
+        for i, result in fact_checker.verify_claims_concurrently(new_claims, articles):
+            results[i] = result
+        new_ids = list(new_summaries)
+        claims_state = [
+            {"claim": claim, "result": result, "article_ids": new_ids} for claim, result in zip(new_claims, results)
+        ] + claims_state
+        shown = [claim["result"] for claim in claims_state[:MAX_CLAIMS_TO_VERIFY]]
+        digest["fact_check"] = {
+            "claims_found": len(claims_state),
+            "credibility_score": fact_checker.calculate_credibility_score(shown),
+            "claims": shown
+        }
+        stats.update(new_claims=len(new_claims), reused_claims=len(shown) - len(new_claims))
+
+    incremental_state.set((category, region), {
+        "articles": summaries,
+        "claims": claims_state,
+        "updated_at": digest["generated_at"]
+    })
+    return digest
+
+
+def describe_refresh(stats: Dict) -> str:
+    """One-line summary of what an incremental refresh reused, for UIs and logs"""
+    text = f"{stats['new_articles']} new / {stats['reused_articles']} reused article summaries"
+    if "new_claims" in stats:
+        text += f", {stats['new_claims']} new / {stats['reused_claims']} reused claim checks"
+    return text
@@ -0,0 +1,238 @@
+"""Background pre-warming of full digests for popular (category, region) pairs.
+
+The scheduler periodically rebuilds the digest (fetch + summary + fact-check) for the most
+requested pairs and publishes it to `digest_store`, so an interactive request for a warm pair
+renders from the store instead of running the pipeline. It runs either as a daemon thread
+inside the Streamlit server (PREWARM_MODE=thread) or as a separate worker process sharing
+the SQLite store:
+
+    python prewarm.py            # refresh forever
+    python prewarm.py --once     # one cycle, e.g. from cron
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from cache import shared_cache
+from incremental import incremental_digest
+from news_pipeline import FETCH_MODES, all_pairs, build_digest, digest_to_json, digest_from_json
+from tracing import start_trace, export_trace
+
+logger = logging.getLogger("prewarm")
+
+PREWARM_MODE = os.getenv("PREWARM_MODE", "off")  # "off" or "thread"
+PREWARM_DB = os.getenv("PREWARM_DB", ".cache/prewarm.sqlite3")
+PREWARM_REFRESH_SECONDS = float(os.getenv("PREWARM_REFRESH_SECONDS", "300"))  # digest age that triggers a rebuild
+PREWARM_POLL_SECONDS = float(os.getenv("PREWARM_POLL_SECONDS", "30"))
+PREWARM_MAX_CONCURRENT = int(os.getenv("PREWARM_MAX_CONCURRENT", "2"))
+PREWARM_TOP_PAIRS = int(os.getenv("PREWARM_TOP_PAIRS", "8"))  # pairs kept warm, most requested first
+PREWARM_FETCH_MODE = os.getenv("PREWARM_FETCH_MODE", "serial")
+PREWARM_INCREMENTAL = os.getenv("PREWARM_INCREMENTAL", "1") == "1"  # summarize only articles new since the last refresh
+POPULARITY_HALF_LIFE_SECONDS = float(os.getenv("POPULARITY_HALF_LIFE_SECONDS", str(6 * 3600)))
+
+# Fresh digests are served as-is; for one more refresh interval a stale digest is still served
+# (labelled with its age) while the scheduler catches up
+digest_store = shared_cache(
+    "digests",
+    ttl=PREWARM_REFRESH_SECONDS,
+    stale_ttl=PREWARM_REFRESH_SECONDS,
+    max_entries=64,
+    db_path=PREWARM_DB or None,
+    serialize=digest_to_json,
+    deserialize=digest_from_json
+)
+
+
+class RequestPopularity:
+    """Exponentially decayed request counts per (category, region), optionally shared through SQLite"""
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE_SECONDS, db_path: Optional[str] = None):
+        self.half_life = half_life
+        self._scores: Dict[Tuple[str, str], Tuple[float, float]] = {}  # pair -> (score, updated_at)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS request_popularity ("
+                "category TEXT NOT NULL, region TEXT NOT NULL, score REAL NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (category, region))"
+            )
+            self._db.commit()
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+
+    def _load(self) -> Dict[Tuple[str, str], Tuple[float, float]]:
+        if self._db is None:
+            return dict(self._scores)
+        try:
+            rows = self._db.execute("SELECT category, region, score, updated_at FROM request_popularity").fetchall()
+        except sqlite3.Error:
+            return dict(self._scores)
+        return {(category, region): (score, updated_at) for category, region, score, updated_at in rows}
+
+    def record(self, category: str, region: str) -> None:
+        now = time.time()
+        with self._lock:
+            score, updated_at = self._load().get((category, region), (0.0, now))
+            self._scores[(category, region)] = (self._decayed(score, updated_at, now) + 1.0, now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO request_popularity (category, region, score, updated_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (category, region, *self._scores[(category, region)]),
+                    )
+                    self._db.commit()
+                except sqlite3.Error:
+                    logger.warning("Could not persist request popularity", exc_info=True)
+
+    def scores(self) -> Dict[Tuple[str, str], float]:
+        now = time.time()
+        with self._lock:
+            return {pair: self._decayed(score, updated_at, now) for pair, (score, updated_at) in self._load().items()}
+
+    def ranked_pairs(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """`pairs` ordered by popularity; never-requested pairs keep their given order at the end"""
+        scores = self.scores()
+        return sorted(pairs, key=lambda pair: -scores.get(pair, 0.0))  # stable sort
+
+
+request_popularity = RequestPopularity(db_path=PREWARM_DB or None)
+
+
+def cached_digest(category: str, region: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """Return (digest, FRESH | STALE) for a pre-warmed pair, or (None, None)"""
+    return digest_store.lookup((category, region))
+
+
+class PrewarmScheduler:
+    """Keeps the digests of the `top_pairs` most requested pairs younger than `refresh_seconds`,
+    rebuilding at most `max_concurrent` of them at a time"""
+
+    def __init__(self, refresh_seconds: float = PREWARM_REFRESH_SECONDS, poll_seconds: float = PREWARM_POLL_SECONDS,
+                 max_concurrent: int = PREWARM_MAX_CONCURRENT, top_pairs: int = PREWARM_TOP_PAIRS,
+                 fetch_mode: str = PREWARM_FETCH_MODE, popularity: RequestPopularity = request_popularity,
+                 incremental: bool = PREWARM_INCREMENTAL):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode {fetch_mode!r}, expected one of {FETCH_MODES}")
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self.max_concurrent = max_concurrent
+        self.top_pairs = top_pairs
+        self.fetch_mode = fetch_mode
+        self.popularity = popularity
+        self.incremental = incremental
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def due_pairs(self) -> List[Tuple[str, str]]:
+        """The top pairs whose digest is missing or older than the refresh interval, most popular first"""
+        now = datetime.now(timezone.utc)
+        due = []
+        for pair in self.popularity.ranked_pairs(all_pairs())[:self.top_pairs]:
+            digest, _ = digest_store.lookup(pair)
+            if digest is None or (now - datetime.fromisoformat(digest["generated_at"])).total_seconds() >= self.refresh_seconds:
+                due.append(pair)
+        return due
+
+    def refresh(self, category: str, region: str) -> Dict:
+        with start_trace("prewarm.refresh", category=category, region=region) as trace:
+            build = incremental_digest if self.incremental else build_digest
+            digest = build(category, region, fetch_mode=self.fetch_mode)
+        export_trace(trace)
+        digest_store.set((category, region), digest)
+        return digest
+
+    def run_cycle(self) -> Dict[str, int]:
+        """Rebuild every due pair within the concurrency budget; return refreshed/failed counts"""
+        due = self.due_pairs()
+        refreshed = failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="prewarm") as executor:
+            futures = {executor.submit(self.refresh, category, region): (category, region) for category, region in due}
+            for future, (category, region) in futures.items():
+                if self._stop.is_set():
+                    future.cancel()
+                    continue
+                try:
+                    future.result()
+                    refreshed += 1
+                except Exception:
+                    logger.exception("Pre-warm failed for %s/%s", category, region)
+                    failed += 1
+        return {"due": len(due), "refreshed": refreshed, "failed": failed}
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                stats = self.run_cycle()
+                if stats["due"]:
+                    logger.info("Pre-warm cycle: %s", stats)
+            except Exception:
+                logger.exception("Pre-warm cycle failed")
+            self._stop.wait(max(0.0, self.poll_seconds - (time.monotonic() - started)))
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="prewarm", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_scheduler: Optional[PrewarmScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def ensure_background_prewarmer() -> Optional[PrewarmScheduler]:
+    """Start the in-process scheduler once per process when PREWARM_MODE=thread"""
+    global _scheduler
+    if PREWARM_MODE != "thread":
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrewarmScheduler()
+            _scheduler.start()
+        return _scheduler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Keep digests of the most requested pairs warm")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    parser.add_argument("--poll-seconds", type=float, default=PREWARM_POLL_SECONDS)
+    parser.add_argument("--max-concurrent", type=int, default=PREWARM_MAX_CONCURRENT)
+    parser.add_argument("--top-pairs", type=int, default=PREWARM_TOP_PAIRS)
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default=PREWARM_FETCH_MODE)
+    parser.add_argument("--full", action="store_true", help="rebuild every digest from scratch instead of incrementally")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    scheduler = PrewarmScheduler(poll_seconds=args.poll_seconds, max_concurrent=args.max_concurrent,
+                                 top_pairs=args.top_pairs, fetch_mode=args.fetch_mode,
+                                 incremental=PREWARM_INCREMENTAL and not args.full)
+    if args.once:
+        stats = scheduler.run_cycle()
+        print(f"Refreshed {stats['refreshed']}/{stats['due']} due pairs ({stats['failed']} errors)")
+        return 1 if stats["failed"] else 0
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
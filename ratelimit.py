@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import tracing
+
+# --- Client-side rate limiting and retries ---
+# Limiters live in a process-wide registry so every Streamlit session and batch worker
+# in the process draws from the same per-API budget. A server-requested pause (Retry-After)
+# is applied to the shared limiter, so every caller backs off, not just the one that got the 429.
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8.0
+MAX_RETRY_AFTER_SECONDS = 30.0  # a longer server-requested wait fails fast instead of stalling the UI
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`.
+
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.configure(rate, capacity)
+
+    def configure(self, rate: float, capacity: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(1.0, rate)
+            self._tokens = self.capacity
+            self._updated = time.monotonic()
+            self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds`, e.g. when the server answered with Retry-After.
+        Applies even when limiting is disabled."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available; return False if that would take longer than `timeout`"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_time = self._paused_until - now
+                elif self.rate <= 0:
+                    return True
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return True
+                    wait_time = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait_time > deadline:
+                return False
+            time.sleep(wait_time)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(name: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """Return the process-wide limiter for `name`, creating it on first use"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(rate, capacity)
+        return _limiters[name]
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as delta-seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY_SECONDS, cap: float = RETRY_MAX_DELAY_SECONDS) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0.0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retries(call: Callable[[], Any], limiter: TokenBucket, classify: Callable[[Exception], Optional[float]],
+                      max_retries: int, name: str = "call",
+                      rate_limited: Optional[Callable[[Exception], bool]] = None) -> Any:
+    """Run `call` under `limiter`, retrying transient failures.
+
+    `classify` returns None for errors that must not be retried, otherwise the server-requested
+    wait in seconds (0.0 when the server gave none). Errors for which `rate_limited` is true but
+    that carry no wait pause the shared limiter for the backoff delay, so every caller backs off
+    together. Retries and the time spent waiting are recorded on the current trace span.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            return call()
+        except Exception as e:
+            retry_after = classify(e)
+            if retry_after is None or attempt >= max_retries or retry_after > MAX_RETRY_AFTER_SECONDS:
+                raise
+            if retry_after:
+                limiter.pause(retry_after)
+                delay = retry_after + random.uniform(0.0, RETRY_BASE_DELAY_SECONDS)  # spread out the wake-ups
+            else:
+                delay = backoff_delay(attempt)
+                if rate_limited is not None and rate_limited(e):
+                    limiter.pause(delay)
+            attempt += 1
+            logger.info("%s failed (%s), retry %d/%d in %.2fs", name, e, attempt, max_retries, delay)
+            tracing.record("retries")
+            tracing.record("retry_wait_ms", round(delay * 1000, 1))
+            time.sleep(delay)
@@ -0,0 +1,94 @@
+import os
+import zlib
+from typing import List, NamedTuple
+
+import numpy as np
+
+from article_index import tokenize
+from articles import Article
+
+# --- Semantic relevance of articles to a user question ---
+# Articles and the question are embedded locally with a hashing vectorizer (stemmed terms
+# hashed into a fixed number of signed dimensions, sublinear tf, idf over the batch) and
+# scored by cosine similarity in one matrix product. CPU-only and needs no model files; only
+# the most relevant articles go into the prompt. numpy is installed with Streamlit.
+
+HASH_DIMENSIONS = 2 ** 12
+RELEVANCE_TOP_K = int(os.getenv("RELEVANCE_TOP_K", "6"))
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "0.1"))  # cosine similarity counted as relevant
+RELEVANCE_MIN_MATCHES = int(os.getenv("RELEVANCE_MIN_MATCHES", "2"))  # fewer relevant articles trigger a search
+MAX_SEARCH_TERMS = 5
+# Words that say what kind of answer is wanted but are useless as search terms
+QUESTION_WORDS = frozenset("""
+latest news happening update updates tell know anything going today recent recently explain
+summary summarize much many
+""".split())
+
+
+class RelevanceResult(NamedTuple):
+    articles: List[Article]  # best first, at most top_k
+    scores: List[float]      # cosine similarity of each selected article
+    relevant: int            # articles of the whole batch scoring at least min_score
+    best_score: float
+
+
+def _stem(token: str) -> str:
+    """Fold the most common plural forms so "rates" matches "rate" """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _hash_counts(texts: List[str]) -> np.ndarray:
+    """Signed hashed term counts, one row per text"""
+    counts = np.zeros((len(texts), HASH_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term in tokenize(text):
+            digest = zlib.crc32(_stem(term).encode("utf-8"))
+            counts[row, digest % HASH_DIMENSIONS] += 1.0 if digest & 0x80000000 else -1.0
+    return counts
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def score_articles(articles: List[Article], query: str) -> np.ndarray:
+    """Cosine similarity of every article's title + description to `query`, in article order"""
+    if not articles:
+        return np.zeros(0, dtype=np.float32)
+    counts = _hash_counts([article.search_text for article in articles] + [query])
+    weights = np.sign(counts) * np.log1p(np.abs(counts))  # sublinear tf, keeping the hash sign
+    document_frequency = np.count_nonzero(counts[:-1], axis=0)
+    idf = np.log((1 + len(articles)) / (1 + document_frequency)) + 1.0
+    vectors = _normalize(weights * idf)
+    return vectors[:-1] @ vectors[-1]
+
+
+def select_relevant(articles: List[Article], query: str, top_k: int = RELEVANCE_TOP_K,
+                    min_score: float = RELEVANCE_MIN_SCORE) -> RelevanceResult:
+    """The `top_k` articles most similar to `query`. Articles below `min_score` are only
+    used when nothing scores higher, so the prompt is never empty."""
+    scores = score_articles(articles, query)
+    order = np.argsort(-scores, kind="stable")
+    relevant = int(np.count_nonzero(scores >= min_score))
+    chosen = order[:top_k] if not relevant else order[:min(top_k, relevant)]
+    return RelevanceResult(
+        [articles[i] for i in chosen],
+        [round(float(scores[i]), 3) for i in chosen],
+        relevant,
+        float(scores[order[0]]) if len(order) else 0.0,
+    )
+
+
+def needs_search(result: RelevanceResult, min_matches: int = RELEVANCE_MIN_MATCHES) -> bool:
+    return result.relevant < min_matches
+
+
+def search_terms(query: str, limit: int = MAX_SEARCH_TERMS) -> str:
+    """Keywords of a question for a NewsAPI `q` search, e.g. "electric vehicles" """
+    terms = [token for token in tokenize(query) if token not in QUESTION_WORDS]
+    return " ".join(list(dict.fromkeys(terms))[:limit])
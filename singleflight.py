@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import tracing
+
+# --- Single-flight request coalescing ---
+# When several sessions ask for the same thing at once (a breaking story, a popular pair),
+# the first caller runs the computation and every concurrent identical caller waits for its
+# result instead of repeating the NewsAPI, Gemini and Wikipedia calls. Each waiter has its
+# own timeout; the leader keeps running when a waiter gives up. A leader that is interrupted
+# rather than failing (a Streamlit rerun or stop, a closed stream) abandons its flight, and
+# its waiters start a new one instead of inheriting the interruption.
+
+COALESCE_TIMEOUT_SECONDS = float(os.getenv("COALESCE_TIMEOUT_SECONDS", "60"))
+
+
+class CoalescedTimeout(TimeoutError):
+    """Raised to a waiter whose shared in-flight call did not finish within its timeout"""
+
+
+class FlightAbandoned(Exception):
+    """Raised by wait() when the leader was interrupted; the caller should begin() again"""
+
+
+class Flight:
+    """One in-flight computation and the outcome its waiters receive"""
+
+    __slots__ = ("done", "value", "error", "abandoned", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.abandoned = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key. Only calls that overlap are shared: once the
+    leader finishes, the next call for the key starts a new flight (caching is the caller's job)."""
+
+    def __init__(self, namespace: str, timeout: float = COALESCE_TIMEOUT_SECONDS):
+        self.namespace = namespace
+        self.timeout = timeout
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "coalesced": 0, "timeouts": 0, "shared_errors": 0, "abandoned": 0}
+
+    def begin(self, key: Hashable) -> Tuple[Flight, bool]:
+        """Join the in-flight call for `key`, or start one; True means the caller leads and must finish() it"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None
+            if leading:
+                flight = self._flights[key] = Flight()
+                self._counters["leaders"] += 1
+            else:
+                flight.waiters += 1
+                self._counters["coalesced"] += 1
+        if not leading:
+            tracing.record(f"singleflight.{self.namespace}.coalesced")
+        return flight, leading
+
+    def finish(self, key: Hashable, flight: Flight, value: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's result (or exception) to every waiter and retire the flight.
+        An interruption that is not an Exception (GeneratorExit, Streamlit's RerunException
+        and StopException, KeyboardInterrupt) abandons the flight instead."""
+        abandoned = error is not None and not isinstance(error, Exception)
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if abandoned:
+                self._counters["abandoned"] += 1
+                self._counters["coalesced"] -= flight.waiters  # they will make the call after all
+            elif error is not None and flight.waiters:
+                self._counters["shared_errors"] += 1
+        if abandoned:
+            flight.abandoned = True
+        else:
+            flight.value, flight.error = value, error
+        flight.done.set()
+
+    def wait(self, flight: Flight, timeout: Optional[float] = None) -> Any:
+        """The leader's result; its exception is re-raised, CoalescedTimeout after `timeout` seconds
+        and FlightAbandoned when the leader was interrupted"""
+        timeout = self.timeout if timeout is None else timeout
+        with tracing.span(f"singleflight.{self.namespace}.wait") as wait_span:
+            if not flight.done.wait(timeout):
+                with self._lock:
+                    self._counters["timeouts"] += 1
+                wait_span.set(timed_out=True)
+                raise CoalescedTimeout(f"Shared {self.namespace} call still running after {timeout:g}s")
+        if flight.abandoned:
+            raise FlightAbandoned(f"Shared {self.namespace} call was abandoned")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def do(self, key: Hashable, compute: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """compute() once for all concurrent callers with the same key. Waiters of an abandoned
+        flight start over, one of them leading the new flight; `timeout` covers all attempts."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            flight, leading = self.begin(key)
+            if leading:
+                break
+            try:
+                return self.wait(flight, max(0.0, deadline - time.monotonic()))
+            except FlightAbandoned:
+                continue
+        try:
+            value = compute()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Counters; `coalesced` is the number of calls saved (callers served by another caller's flight)"""
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._flights))
@@ -0,0 +1,132 @@
+"""Cold-start profile of the Streamlit script: import times and time to first paint.
+
+Each run starts a fresh interpreter with `-X importtime`, imports streamlit (already loaded
+by the server before any script runs, so not counted), then executes the script in bare mode
+and records when the first selectbox is created:
+
+    python startup_profile.py               # report for news_app.py
+    python startup_profile.py --runs 5
+
+benchmark.py includes the same numbers under "startup" and checks them against
+TIME_TO_FIRST_PAINT_TARGET_MS.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+DEFAULT_SCRIPT = "news_app.py"
+TIME_TO_FIRST_PAINT_TARGET_MS = float(os.getenv("TIME_TO_FIRST_PAINT_TARGET_MS", "250"))
+SCRIPT_MARKER = "--- startup_profile: script starts ---"
+
+# Runs in the child interpreter; argv[1] is the script path
+PROBE = f"""
+import json, runpy, sys, time
+import streamlit as st
+
+first_paint = []
+_selectbox = st.selectbox
+
+def selectbox(*args, **kwargs):
+    if not first_paint:
+        first_paint.append(time.perf_counter())
+    return _selectbox(*args, **kwargs)
+
+st.selectbox = selectbox
+sys.stderr.write({SCRIPT_MARKER!r} + "\\n")
+start = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+end = time.perf_counter()
+print(json.dumps({{
+    "time_to_first_paint_ms": (first_paint[0] - start) * 1000 if first_paint else None,
+    "script_ms": (end - start) * 1000,
+}}))
+"""
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Imports made by the script itself: module, self and cumulative ms, nesting depth"""
+    entries = []
+    _, _, script_output = stderr.partition(SCRIPT_MARKER)
+    for line in script_output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return entries
+
+
+def run_once(script: str) -> Dict:
+    env = dict(os.environ, STREAMLIT_GLOBAL_SHOW_WARNING_ON_DIRECT_EXECUTION="false")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, script],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(script)), check=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["imports"] = parse_importtime(completed.stderr)
+    return timings
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def profile_startup(script: str = DEFAULT_SCRIPT, runs: int = 3,
+                    target_ms: float = TIME_TO_FIRST_PAINT_TARGET_MS) -> Dict:
+    """Median time to first paint and script time over `runs` cold starts, with the script's
+    top-level imports (cumulative ms) and the modules with the most self time"""
+    samples = [run_once(script) for _ in range(runs)]
+    first_paint = _median([sample["time_to_first_paint_ms"] for sample in samples])
+    top_level, self_times = {}, {}
+    for sample in samples:
+        for entry in sample["imports"]:
+            self_times.setdefault(entry["module"], []).append(entry["self_ms"])
+            if entry["depth"] == 0:
+                top_level.setdefault(entry["module"], []).append(entry["cumulative_ms"])
+    return {
+        "time_to_first_paint_ms": round(first_paint, 1),
+        "script_ms": round(_median([sample["script_ms"] for sample in samples]), 1),
+        "target_ms": target_ms,
+        "within_target": first_paint <= target_ms,
+        "imports_ms": {module: round(_median(values), 1) for module, values in top_level.items()},
+        "slowest_modules_ms": dict(sorted(
+            ((module, round(_median(values), 1)) for module, values in self_times.items()),
+            key=lambda item: -item[1]
+        )[:10]),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start imports and time to first paint")
+    parser.add_argument("script", nargs="?", default=DEFAULT_SCRIPT)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--target-ms", type=float, default=TIME_TO_FIRST_PAINT_TARGET_MS)
+    args = parser.parse_args(argv)
+
+    profile = profile_startup(args.script, args.runs, args.target_ms)
+    print(f"Time to first paint: {profile['time_to_first_paint_ms']:.1f} ms "
+          f"(target {profile['target_ms']:.0f} ms, {'met' if profile['within_target'] else 'MISSED'})")
+    print(f"Whole script: {profile['script_ms']:.1f} ms\n")
+    print("Imports made by the script (cumulative ms):")
+    for module, ms in sorted(profile["imports_ms"].items(), key=lambda item: -item[1]):
+        print(f"  {module:<40} {ms:>8.1f}")
+    print("\nSlowest modules (self ms):")
+    for module, ms in profile["slowest_modules_ms"].items():
+        print(f"  {module:<40} {ms:>8.1f}")
+    return 0 if profile["within_target"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+from articles import Article
+from dedup import deduplicate_articles
+
+
+def summary(articles):
+    return [(article.title, article.source, article.covered_by, article.related_sources) for article in articles]
+
+
+def test_near_duplicates_collapse_into_one_representative():
+    articles = [
+        Article("Central bank raises interest rates to curb inflation", source="Reuters", url="https://a.example/1"),
+        Article("Central bank raises interest rates to curb inflation again", "Rates go up by a quarter point",
+                source="AP", url="https://b.example/2"),
+        Article("Local team wins the championship final", source="ESPN", url="https://c.example/3"),
+    ]
+    deduplicated = deduplicate_articles(articles)
+
+    assert len(deduplicated) == 2
+    assert deduplicated[0].source == "AP"  # the one with a description
+    assert deduplicated[0].covered_by == 2
+    assert deduplicated[0].related_sources == ("Reuters",)
+    assert deduplicated[1].covered_by == 1
+
+
+def test_deduplicating_twice_keeps_coverage():
+    headlines = deduplicate_articles([
+        Article("Storm forces evacuations along the coast", source="Reuters", url="https://a.example/storm"),
+        Article("Storm forces evacuations along the coast tonight", source="AP", url="https://b.example/storm"),
+        Article("Markets close higher on tech earnings", source="Bloomberg", url="https://c.example/markets"),
+    ])
+    # Headlines merged with search results that repeat a story are deduplicated again
+    search = [Article("Storm forces evacuations along the coast", "Thousands leave their homes",
+                      source="BBC News", url="https://d.example/storm")]
+    merged = deduplicate_articles(headlines + search)
+
+    storm = merged[0]
+    assert storm.source == "BBC News"
+    assert storm.covered_by == 3
+    assert set(storm.related_sources) == {"Reuters", "AP"}
+    assert summary(deduplicate_articles(merged)) == summary(merged)
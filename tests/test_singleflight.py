@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import CoalescedTimeout, SingleFlight
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's RerunException / StopException"""
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def start_waiter(flight, key, compute, **kwargs):
+    """Call flight.do() in a thread once the leader is running; returns (thread, outcome)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = flight.do(key, compute, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_leader_error_is_shared_with_waiters():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        raise ValueError("upstream failed")
+
+    leader, leader_outcome = start_waiter(flight, "key", compute)
+    wait_for(lambda: calls)
+    waiter, waiter_outcome = start_waiter(flight, "key", compute)
+    wait_for(lambda: flight.stats()["coalesced"] == 1)
+    release.set()
+    leader.join(2)
+    waiter.join(2)
+
+    assert len(calls) == 1
+    assert isinstance(leader_outcome["error"], ValueError)
+    assert waiter_outcome["error"] is leader_outcome["error"]
+    assert flight.stats()["shared_errors"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_waiter_times_out_while_leader_keeps_running():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(2)
+        return "result"
+
+    leader, leader_outcome = start_waiter(flight, "key", compute)
+    assert started.wait(2)
+    with pytest.raises(CoalescedTimeout):
+        flight.do("key", compute, timeout=0.05)
+    release.set()
+    leader.join(2)
+
+    assert leader_outcome == {"value": "result"}
+    assert flight.stats()["timeouts"] == 1
+    # Finished flights are not cached: the next call computes again
+    assert flight.do("key", lambda: "fresh") == "fresh"
+
+
+def test_waiters_lead_again_when_the_leader_is_interrupted():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def interrupted():
+        calls.append("interrupted")
+        release.wait(2)
+        raise Interrupted()
+
+    def compute():
+        calls.append("compute")
+        return "result"
+
+    leader, leader_outcome = start_waiter(flight, "key", interrupted)
+    wait_for(lambda: calls)
+    waiter, waiter_outcome = start_waiter(flight, "key", compute)
+    wait_for(lambda: flight.stats()["coalesced"] == 1)
+    release.set()
+    leader.join(2)
+    waiter.join(2)
+
+    assert isinstance(leader_outcome["error"], Interrupted)
+    assert waiter_outcome == {"value": "result"}
+    assert calls == ["interrupted", "compute"]
+    stats = flight.stats()
+    assert stats["abandoned"] == 1
+    assert stats["coalesced"] == 0  # the waiter made its own call after all
+    assert stats["leaders"] == 2
+    assert stats["in_flight"] == 0
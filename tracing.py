@@ -0,0 +1,207 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# --- Lightweight pipeline tracing ---
+# Spans record durations plus counters (cache hits, retries, token counts) for one request.
+# Context travels through contextvars; wrap callables with propagate() before handing them
+# to a thread pool so worker spans attach to the right parent. Finished traces can be appended
+# to a JSONL file in the OTLP/JSON layout used by OpenTelemetry's file exporter.
+
+SERVICE_NAME = "ai-news-summarizer"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", ".cache/traces.jsonl")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name: str, trace: "Trace", parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes)
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._start = time.perf_counter()
+        self._duration: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def set(self, **attributes) -> None:
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def increment(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self._duration is not None:
+            return
+        self._duration = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self._duration * 1e9)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self._duration is None else self._duration * 1000
+
+    @property
+    def depth(self) -> int:
+        depth, parent = 0, self.parent
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+        return depth
+
+    def to_otlp(self) -> Dict:
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(key, value) for key, value in sorted(self.attributes.items())],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+class _NullSpan:
+    """Stand-in used when no trace is active, so instrumented code never has to check"""
+    name = None
+    attributes: Dict[str, Any] = {}
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def increment(self, key: str, amount: float = 1) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self.root = self._add(Span(name, self, None, attributes))
+
+    def _add(self, span: Span) -> Span:
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def rows(self) -> List[Dict]:
+        """Spans in start order with their depth, for rendering as an indented table"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        return [
+            {"name": span.name, "depth": span.depth, "duration_ms": span.duration_ms,
+             "attributes": dict(span.attributes), "error": span.error}
+            for span in spans
+        ]
+
+    def to_otlp(self) -> Dict:
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Start a new trace whose root span is current for the duration of the block"""
+    trace = Trace(name, attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.end(e)
+        raise
+    finally:
+        trace.root.end()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, activate: bool = True, **attributes) -> Iterator[Span]:
+    """Record a child of the current span. With activate=False the span is not made current,
+    which is required for spans that stay open across generator yields."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    child = parent.trace._add(Span(name, parent.trace, parent, attributes))
+    token = _current_span.set(child) if activate else None
+    try:
+        yield child
+    except Exception as e:
+        child.end(e)
+        raise
+    finally:
+        child.end()
+        if token is not None:
+            _current_span.reset(token)
+
+
+def current_span():
+    return _current_span.get() or NULL_SPAN
+
+
+def record(key: str, amount: float = 1) -> None:
+    """Increment a counter on the current span, if any"""
+    current_span().increment(key, amount)
+
+
+def propagate(fn: Callable, parent: Optional[Span] = None) -> Callable:
+    """Bind `fn` to the caller's trace context so spans opened in a worker thread nest correctly.
+    `parent` overrides the current span, e.g. for a span that was opened with activate=False."""
+    context = contextvars.copy_context()
+
+    def call(*args, **kwargs):
+        if isinstance(parent, Span):
+            _current_span.set(parent)
+        return fn(*args, **kwargs)
+
+    def run_in_context(*args, **kwargs):
+        return context.copy().run(call, *args, **kwargs)
+
+    return run_in_context
+
+
+def export_trace(trace: Trace, path: str = TRACE_EXPORT_PATH) -> None:
+    """Append the trace as one OTLP/JSON line so traces can be aggregated across sessions"""
+    if not path:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = json.dumps(trace.to_otlp())
+    with _export_lock, open(path, "a", encoding="utf-8") as output:
+        output.write(line + "\n")
@@ -0,0 +1,187 @@
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+from article_index import STOP_WORDS
+from cache import shared_cache
+from tracing import span
+
+# --- Wikipedia entity resolution for claim verification ---
+# Candidate entities (proper-noun phrases) are extracted from claims locally and resolved
+# through the MediaWiki action API, up to 50 titles per request. Found and missing titles are
+# cached separately (positive and negative TTLs), so repeated entities cost no round trip.
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_PAGE_URL = "https://en.wikipedia.org/wiki/"
+MAX_TITLES_PER_REQUEST = 50  # MediaWiki limit for anonymous clients
+MAX_ENTITIES_PER_CLAIM = 3
+WIKIPEDIA_CACHE_DB = os.getenv("WIKIPEDIA_CACHE_DB", ".cache/wikipedia_cache.sqlite3")
+WIKIPEDIA_POSITIVE_TTL_SECONDS = float(os.getenv("WIKIPEDIA_POSITIVE_TTL_SECONDS", str(7 * 24 * 3600)))
+WIKIPEDIA_NEGATIVE_TTL_SECONDS = float(os.getenv("WIKIPEDIA_NEGATIVE_TTL_SECONDS", str(6 * 3600)))
+
+found_entity_cache = shared_cache(
+    "wikipedia_found",
+    ttl=WIKIPEDIA_POSITIVE_TTL_SECONDS,
+    max_entries=2048,
+    db_path=WIKIPEDIA_CACHE_DB or None
+)
+missing_entity_cache = shared_cache(
+    "wikipedia_missing",
+    ttl=WIKIPEDIA_NEGATIVE_TTL_SECONDS,
+    max_entries=2048,
+    db_path=WIKIPEDIA_CACHE_DB or None
+)
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9][\w&.'’-]*")
+CONNECTORS = frozenset({"of", "the", "de"})
+CALENDAR_WORDS = frozenset("""
+january february march april may june july august september october november december
+monday tuesday wednesday thursday friday saturday sunday
+""".split())
+
+
+def _is_name_word(word: str) -> bool:
+    return word[0].isupper() and word.lower() not in STOP_WORDS and word.lower() not in CALENDAR_WORDS
+
+
+def extract_entities(claim: str, limit: int = MAX_ENTITIES_PER_CLAIM) -> List[str]:
+    """Proper-noun phrases in `claim`, in order of appearance, e.g. "Federal Reserve" or "Nvidia".
+
+    Runs of capitalized words are joined, allowing connectors such as "of" inside a run
+    ("Bank of England"); punctuation ends a run, and stop-words like a sentence-initial
+    "The", month and day names are dropped.
+    """
+    entities: List[str] = []
+    run: List[str] = []
+
+    def flush():
+        while run and not _is_name_word(run[-1]):
+            run.pop()
+        if run:
+            entity = " ".join(run)
+            if entity not in entities:
+                entities.append(entity)
+        run.clear()
+
+    previous_end = 0
+    for match in WORD_PATTERN.finditer(claim):
+        if claim[previous_end:match.start()].strip():
+            flush()  # punctuation between words, e.g. "Apple, Google"
+        previous_end = match.end()
+        word = re.sub(r"['’]s$", "", match.group())
+        if word.count(".") == 1 and word.endswith("."):
+            word = word[:-1]  # sentence end, but keep abbreviations like "U.S."
+        if _is_name_word(word):
+            run.append(word)
+        elif run and word.lower() in CONNECTORS:
+            run.append(word)
+        else:
+            flush()
+        if match.group().endswith((".", "'s", "’s")):
+            flush()
+    flush()
+    return entities[:limit]
+
+
+def page_url(title: str) -> str:
+    return WIKIPEDIA_PAGE_URL + quote(title.replace(" ", "_"))
+
+
+def _query_titles(titles: List[str], get: Callable[[str, Dict], Dict]) -> Dict[str, Optional[Dict]]:
+    """One action=query request for up to MAX_TITLES_PER_REQUEST titles; None marks a missing title"""
+    data = get(WIKIPEDIA_API_URL, {
+        "action": "query",
+        "format": "json",
+        "formatversion": "2",
+        "redirects": "1",
+        "prop": "pageprops",
+        "ppprop": "disambiguation|wikibase-shortdesc",
+        "titles": "|".join(titles),
+    })
+    query = data.get("query", {})
+    renamed = {}
+    for mapping in query.get("normalized", []) + query.get("redirects", []):
+        renamed[mapping["from"]] = mapping["to"]
+    pages = {page["title"]: page for page in query.get("pages", [])}
+
+    results = {}
+    for title in titles:
+        resolved = title
+        for _ in range(3):  # normalization, then up to two redirect hops
+            resolved = renamed.get(resolved, resolved)
+        page = pages.get(resolved)
+        pageprops = (page or {}).get("pageprops", {})
+        if page is None or page.get("missing") or page.get("invalid") or "disambiguation" in pageprops:
+            results[title] = None
+        else:
+            results[title] = {
+                "title": page["title"],
+                "url": page_url(page["title"]),
+                "description": pageprops.get("wikibase-shortdesc", "")
+            }
+    return results
+
+
+def resolve_entities(entities: Iterable[str], get: Callable[[str, Dict], Dict]) -> Dict[str, Optional[Dict]]:
+    """Map each entity to its Wikipedia page ({title, url, description}) or None.
+
+    Cached entities cost nothing; the rest are resolved in batches of up to 50 titles with
+    `get(url, params) -> json`. Entities whose lookup failed are left out of the result and
+    are not cached.
+    """
+    results: Dict[str, Optional[Dict]] = {}
+    unknown = []
+    for entity in dict.fromkeys(entities):
+        page, state = found_entity_cache.lookup(entity)
+        if state is not None:
+            results[entity] = page
+        elif missing_entity_cache.lookup(entity)[1] is not None:
+            results[entity] = None
+        else:
+            unknown.append(entity)
+
+    with span("wikipedia.resolve", entities=len(results) + len(unknown), cached=len(results)) as resolve_span:
+        for start in range(0, len(unknown), MAX_TITLES_PER_REQUEST):
+            batch = unknown[start:start + MAX_TITLES_PER_REQUEST]
+            try:
+                pages = _query_titles(batch, get)
+            except Exception as e:
+                resolve_span.set(error=f"{type(e).__name__}: {e}")
+                continue
+            resolve_span.increment("requests")
+            for entity, page in pages.items():
+                if page is None:
+                    missing_entity_cache.set(entity, True)
+                else:
+                    found_entity_cache.set(entity, page)
+                results[entity] = page
+        resolve_span.set(found=sum(1 for page in results.values() if page))
+    return results
+
+
+class ClaimEntityResolver:
+    """Resolves the entities of every claim in a report with at most one batched lookup.
+
+    The first claim that needs Wikipedia triggers the lookup for all registered claims;
+    later claims read the results from the entity caches.
+    """
+
+    def __init__(self, get: Callable[[str, Dict], Dict]):
+        self.get = get
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+
+    def register(self, claims: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.extend(claims)
+
+    def pages_for(self, claim: str) -> List[Dict]:
+        """Wikipedia pages for the entities in `claim`, in order of appearance"""
+        entities = extract_entities(claim)
+        with self._lock:
+            wanted = entities + [entity for pending in self._pending for entity in extract_entities(pending)]
+            self._pending = []
+            pages = resolve_entities(wanted, self.get)
+        return [pages[entity] for entity in entities if pages.get(entity)]